@@ -0,0 +1,187 @@
+"""
+MD→RT menubar application: Cocoa/rumps side, loaded only when the app starts
+"""
+
+import queue
+import threading
+
+from . import rumps
+from .clipboard import ClipboardPoller, general_pasteboard
+from .converter import markdown_to_styled_html_and_text
+from .detector import MAX_INPUT_CHARS, is_markdown
+from .menubar import (
+    is_converted_html,
+    setup_logging,
+    read_plain_text_from_pasteboard,
+    add_styled_html_to_pasteboard_preserving_original,
+)
+
+class Md2RtMenuApp(rumps.App):
+    def __init__(self, log_level='normal'):
+        super().__init__("MD→RT", icon=None, quit_button=None)
+        
+        # Setup logging
+        self.log = setup_logging(log_level)
+        
+        # State
+        self._pasteboard = general_pasteboard()
+        self._running = False
+        self._poller = None
+        # Change count of our own last write, only touched by the worker
+        self._self_write_change_count = None
+
+        # Clipboard changes are polled and handled off the main run loop, so
+        # neither detection nor API latency can block the menu bar.
+        # Holds at most one pending change: a newer copy replaces a stale one.
+        self._work_q = queue.Queue(maxsize=1)
+        threading.Thread(target=self._conversion_worker, daemon=True).start()
+
+        # Create menu items
+        self._start_item = rumps.MenuItem('Start', callback=self.start_clicked)
+        self._stop_item = rumps.MenuItem('Stop', callback=self.stop_clicked)
+        self._quit_item = rumps.MenuItem('Quit', callback=self.quit_clicked)
+        self._debug_item = rumps.MenuItem('Debug Info', callback=self.debug_clicked)
+
+        # Auto-start when launched
+        self.start_watcher()
+
+    def _update_menu(self):
+        """Update menu items based on current state."""
+        # Clear the menu completely
+        self.menu.clear()
+
+        # Add only the appropriate items based on state
+        if self._running:
+            # When running, show Stop, Debug, and Quit
+            self.menu.add(self._stop_item)
+            self.menu.add(self._debug_item)
+            self.menu.add(rumps.separator)
+            self.menu.add(self._quit_item)
+        else:
+            # When stopped, show Start, Debug, and Quit
+            self.menu.add(self._start_item)
+            self.menu.add(self._debug_item)
+            self.menu.add(rumps.separator)
+            self.menu.add(self._quit_item)
+
+    def start_watcher(self):
+        """Start the clipboard watcher."""
+        if self._running:
+            return
+
+        self.log.info("🚀 Starting clipboard watcher...")
+        self._running = True
+        self.log.info("🔍 Starting clipboard monitoring, initial count: %s", self._pasteboard.changeCount())
+
+        # Backs off while the clipboard is idle and debounces bursts
+        self._poller = ClipboardPoller()
+        threading.Thread(target=self._poller.run, args=(self._queue_change,), daemon=True).start()
+        self.log.info("✅ Clipboard watcher started")
+
+        self._update_menu()
+        rumps.notification("MD→RT", "Started", "Watching clipboard for Markdown")
+
+    def stop_watcher(self):
+        """Stop the clipboard watcher."""
+        if not self._running:
+            return
+
+        self.log.info("🛑 Stopping clipboard watcher...")
+        self._running = False
+        self._poller.stop()
+        self._poller = None
+        self.log.info("🔍 Clipboard monitoring stopped")
+        self._update_menu()
+        rumps.notification("MD→RT", "Stopped", "Stopped watching clipboard")
+
+    def debug_clicked(self, _):
+        """Show debug information."""
+        self.log.info("🔍 Debug info requested")
+        
+        # Check clipboard contents
+        text = read_plain_text_from_pasteboard()
+        if text:
+            self.log.info("📋 Current clipboard text: %r...", text[:200])
+            is_md = not is_converted_html(text) and is_markdown(text)
+            self.log.info("📝 Is markdown: %s", is_md)
+            
+            if is_md:
+                html, plain = markdown_to_styled_html_and_text(text)
+                self.log.info("🔄 Generated HTML length: %d", len(html))
+                self.log.info("🔄 HTML preview: %s...", html[:500])
+        else:
+            self.log.info("📋 No text in clipboard")
+        
+        # Show debug info notification
+        rumps.notification("MD→RT", "Debug Info", "Check terminal for debug information")
+
+    def _queue_change(self, change_count):
+        """Queue a clipboard change for the worker (called on the poller thread)."""
+        try:
+            self._work_q.put_nowait(change_count)
+        except queue.Full:
+            # Drop the stale pending change in favour of the latest one
+            try:
+                self._work_q.get_nowait()
+                self._work_q.task_done()
+            except queue.Empty:
+                pass
+            self._work_q.put_nowait(change_count)
+
+    def _process_clipboard_change(self, change_count):
+        """Convert Markdown copied at this change count and write it back."""
+        if change_count == self._self_write_change_count:
+            # Our own write of the styled HTML
+            return
+
+        text = read_plain_text_from_pasteboard()
+        if not text:
+            return
+        if len(text) > MAX_INPUT_CHARS:
+            self.log.info("📋 Skipping large clipboard (%d chars)", len(text))
+            return
+
+        # Check if it's markdown
+        if is_converted_html(text) or not is_markdown(text):
+            self.log.debug("📝 Not Markdown, ignoring")
+            return
+
+        self.log.info("✅ Markdown detected, converting...")
+        html, plain = markdown_to_styled_html_and_text(text)
+        self.log.info("🔄 Conversion complete, HTML length: %d", len(html))
+
+        # Don't overwrite something the user copied in the meantime; that
+        # change is already queued and gets its own conversion (a cache hit
+        # when the same Markdown was copied again)
+        if self._pasteboard.changeCount() != change_count:
+            self.log.info("📋 Clipboard changed during conversion, skipping")
+            return
+
+        # Add to clipboard
+        success = add_styled_html_to_pasteboard_preserving_original(html, text)
+        self._self_write_change_count = self._pasteboard.changeCount()
+        if success:
+            self.log.info("✅ Styled HTML added to clipboard!")
+        else:
+            self.log.error("❌ Failed to add HTML to clipboard")
+
+    def _conversion_worker(self):
+        """Handle queued clipboard changes one at a time."""
+        while True:
+            change_count = self._work_q.get()
+            try:
+                if self._running:
+                    self._process_clipboard_change(change_count)
+            except Exception as exc:
+                self.log.error("❌ Processing error: %s", exc)
+            finally:
+                self._work_q.task_done()
+
+    def start_clicked(self, _):
+        self.start_watcher()
+
+    def stop_clicked(self, _):
+        self.stop_watcher()
+
+    def quit_clicked(self, _):
+        rumps.quit_application()
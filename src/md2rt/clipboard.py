@@ -1,44 +1,71 @@
 from __future__ import annotations
 
+import threading
 import time
 from typing import Optional
 
 
+_general_pasteboard = None
+
+
+def general_pasteboard():
+    """Return the general pasteboard, looked up once and reused afterwards."""
+    global _general_pasteboard
+    if _general_pasteboard is None:
+        from AppKit import NSPasteboard
+
+        _general_pasteboard = NSPasteboard.generalPasteboard()
+    return _general_pasteboard
+
+
 def read_plain_text_from_pasteboard() -> Optional[str]:
-    """Return the current plain text contents of the general pasteboard, if any."""
-    from AppKit import NSPasteboard, NSPasteboardTypeString
+    """Return the current plain text contents of the general pasteboard, if any.
 
-    pasteboard = NSPasteboard.generalPasteboard()
-    value = pasteboard.stringForType_(NSPasteboardTypeString)
-    if value is None:
+    The UTF-8 bytes are read as NSData and decoded once, skipping the
+    NSString bridge.
+    """
+    from AppKit import NSPasteboardTypeString
+
+    pasteboard = general_pasteboard()
+    data = pasteboard.dataForType_(NSPasteboardTypeString)
+    if data is None:
         return None
-    text = str(value)
+    text = bytes(data).decode("utf-8", "replace")
     return text if text else None
 
 
 
 
-def add_styled_html_to_pasteboard_preserving_original(styled_html: str, original_markdown: str) -> None:
+def add_styled_html_to_pasteboard_preserving_original(styled_html: str, original_markdown: str) -> int:
     """Add Apple HTML format to pasteboard while preserving the original Markdown text.
 
     Creates a pasteboard item with both styled HTML and plain text representations,
     so rich text apps get formatting while plain text apps get the original.
-    """
-    from AppKit import NSPasteboard, NSPasteboardTypeString, NSPasteboardTypeHTML
 
-    pasteboard = NSPasteboard.generalPasteboard()
+    Returns the pasteboard change count of this write, so callers can recognize
+    (and skip) their own change.
+    """
+    from AppKit import NSPasteboardItem, NSPasteboardTypeString, NSPasteboardTypeHTML
+    from Foundation import NSData
 
-    # Clear and set both formats in a single pasteboard item
-    pasteboard.clearContents()
+    # Build a single item so the pasteboard changes once, with all types in place
+    item = NSPasteboardItem.alloc().init()
 
     # Set Apple HTML data (this is the key format that works!)
-    pasteboard.setString_forType_(styled_html, 'Apple HTML pasteboard type')
-    
+    html_bytes = styled_html.encode('utf-8')
+    html_data = NSData.dataWithBytes_length_(html_bytes, len(html_bytes))
+    item.setData_forType_(html_data, 'Apple HTML pasteboard type')
+
     # Also set the standard HTML type for broader compatibility
-    pasteboard.setString_forType_(styled_html, NSPasteboardTypeHTML)
+    item.setData_forType_(html_data, NSPasteboardTypeHTML)
 
     # Set plain text as the original Markdown
-    pasteboard.setString_forType_(original_markdown, NSPasteboardTypeString)
+    item.setString_forType_(original_markdown, NSPasteboardTypeString)
+
+    pasteboard = general_pasteboard()
+    pasteboard.clearContents()
+    pasteboard.writeObjects_([item])
+    return pasteboard.changeCount()
 
 
 class ClipboardPoller:
@@ -46,27 +73,59 @@ class ClipboardPoller:
 
     This avoids heavy event wiring by using `changeCount` and a short polling
     interval. The caller is responsible for the callback logic.
+
+    After `idle_seconds` without a change the interval doubles on each poll,
+    up to `max_interval_seconds`, and drops back as soon as a change is seen.
+    This keeps wakeups rare while the clipboard is idle.
+
+    A burst of changes is reported once: `on_change` runs only after the
+    change count has held still for `settle_seconds`.
     """
 
-    def __init__(self, interval_seconds: float = 0.3) -> None:
+    def __init__(
+        self,
+        interval_seconds: float = 0.3,
+        max_interval_seconds: float = 2.0,
+        idle_seconds: float = 30.0,
+        settle_seconds: float = 0.15,
+    ) -> None:
         self.interval_seconds = interval_seconds
-        self._stopped = False
+        self.max_interval_seconds = max(max_interval_seconds, interval_seconds)
+        self.idle_seconds = idle_seconds
+        self.settle_seconds = settle_seconds
+        self._stop_event = threading.Event()
         self._last_change_count: Optional[int] = None
 
     def stop(self) -> None:
-        self._stopped = True
+        """Stop the loop; a poll in progress wakes immediately."""
+        self._stop_event.set()
 
     def run(self, on_change: callable[[int], None]) -> None:
-        from AppKit import NSPasteboard
-
-        pasteboard = NSPasteboard.generalPasteboard()
-        self._last_change_count = int(pasteboard.changeCount())
-
-        while not self._stopped:
-            current = int(pasteboard.changeCount())
+        pasteboard = general_pasteboard()
+        self._last_change_count = pasteboard.changeCount()
+        last_change_at = time.monotonic()
+        pending_since: Optional[float] = None
+        interval = self.interval_seconds
+
+        while not self._stop_event.is_set():
+            # Fixed cadence: time spent in on_change does not delay the next poll
+            now = time.monotonic()
+            current = pasteboard.changeCount()
             if current != self._last_change_count:
                 self._last_change_count = current
+                pending_since = now
+                last_change_at = now
+                interval = self.interval_seconds
+            if pending_since is not None and now - pending_since >= self.settle_seconds:
+                pending_since = None
                 on_change(current)
-            time.sleep(self.interval_seconds)
-
-
+                last_change_at = time.monotonic()
+            elif time.monotonic() - last_change_at > self.idle_seconds:
+                interval = min(interval * 2, self.max_interval_seconds)
+            # Taken after the interval update, so a change seen after backoff
+            # is settled at the base cadence; a pending change is re-checked
+            # as soon as its settle time is up
+            deadline = now + interval
+            if pending_since is not None:
+                deadline = min(deadline, pending_since + self.settle_seconds)
+            self._stop_event.wait(max(0.0, deadline - time.monotonic()))
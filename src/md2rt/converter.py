@@ -1,118 +1,402 @@
 """Markdown to styled HTML conversion using external API."""
 
-import json
-import base64
+import binascii
+import hashlib
+import http.client
 import re
-from typing import Tuple
-import urllib.request
+import threading
+import time
+from collections import OrderedDict
+from html import escape
+from json.encoder import encode_basestring
+from typing import Optional, Tuple
 
+from .detector import _PATTERNS
 
-def markdown_to_html_via_api(text: str) -> str:
-    """Convert markdown text to HTML using external API."""
-    url = 'https://hook.us1.make.com/2jf9wjjs1oupgxbt5t8w5brrkqt7gjxv'
-    
-    # Prepare the request data
-    data = {
-        'markdownText': text
-    }
-    
-    # Convert to JSON
-    json_data = json.dumps(data).encode('utf-8')
-    
-    # Create the request
-    req = urllib.request.Request(
-        url,
-        data=json_data,
-        headers={
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/138.0.0.0 Safari/537.36',
-            'Content-Type': 'application/json',
-            'Referer': 'https://www.switchlabs.dev/'
-        }
-    )
+
+API_HOST = 'hook.us1.make.com'
+API_PATH = '/2jf9wjjs1oupgxbt5t8w5brrkqt7gjxv'
+API_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/138.0.0.0 Safari/537.36',
+    'Content-Type': 'application/json',
+    'Accept': 'text/html',
+    'Referer': 'https://www.switchlabs.dev/'
+}
+API_TIMEOUT = 10
+API_RETRIES = 2
+API_RETRY_STATUSES = {502, 503, 504}
+API_BASE64_PREFIX = b'data:application/octet-stream;base64,'
+
+# Short Markdown is converted locally unless it uses syntax the local
+# converter cannot render
+LOCAL_CONVERSION_MAX_CHARS = 256
+_CODE_FENCE_RE = dict(_PATTERNS)['code_fence']
+_TABLE_RE = dict(_PATTERNS)['table']
+_SETEXT_RE = dict(_PATTERNS)['heading_setext']
+_LOCAL_UNSUPPORTED_RE = re.compile(
+    r'^[ \t]+(?:[-*+]|\d+\.)\s'     # nested list item
+    r'|^[ \t]*>.*\n[ \t]*>'         # multi-line blockquote
+    r'|~~'                          # strikethrough
+    r'|\\[\\`*_{}\[\]()#+\-.!>~|]'  # backslash escape
+    r'|\*\*\*|___'                  # combined strong and emphasis
+    r'|\]\([^)\s]*\s'               # link or image title
+    r'|<[A-Za-z/!?]|&#?\w+;',       # inline HTML and entities
+    re.M,
+)
+
+# Kept-alive HTTPS connection reused across conversions
+_connection: Optional[http.client.HTTPSConnection] = None
+_connection_lock = threading.Lock()
+
+CACHE_MAX_ENTRIES = 64
+CACHE_MAX_CHARS = 4 * 1024 * 1024
+
+
+class _LRUCache:
+    """Small LRU cache bounded by entry count and total cached characters."""
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, max_chars: int = CACHE_MAX_CHARS) -> None:
+        self.max_entries = max_entries
+        self.max_chars = max_chars
+        self._items: "OrderedDict[bytes, str]" = OrderedDict()
+        self._chars = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: bytes) -> Optional[str]:
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None:
+                self._items.move_to_end(key)
+            return value
+
+    def put(self, key: bytes, value: str) -> None:
+        if len(value) > self.max_chars:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self._chars -= len(old)
+            self._items[key] = value
+            self._chars += len(value)
+            while len(self._items) > self.max_entries or self._chars > self.max_chars:
+                _, evicted = self._items.popitem(last=False)
+                self._chars -= len(evicted)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self._chars = 0
+
+
+# Markdown digest -> final styled HTML, so repeat copies skip every stage
+_conversion_cache = _LRUCache()
+
+
+def _digest(text: str) -> bytes:
+    """Return a short content hash used as cache key."""
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+
+
+def _post_to_api(body: bytes) -> bytes:
+    """POST the request body to the API, reusing the open connection when possible."""
+    global _connection
+
+    with _connection_lock:
+        for attempt in range(API_RETRIES + 1):
+            if _connection is None:
+                _connection = http.client.HTTPSConnection(API_HOST, timeout=API_TIMEOUT)
+            try:
+                _connection.request('POST', API_PATH, body=body, headers=API_HEADERS)
+                response = _connection.getresponse()
+                response_body = response.read()
+            except (ConnectionResetError, BrokenPipeError):
+                # Stale keep-alive connection (includes RemoteDisconnected):
+                # reconnect and retry
+                _connection.close()
+                _connection = None
+                if attempt == API_RETRIES:
+                    raise
+                continue
+            except (http.client.HTTPException, OSError):
+                # Timeouts and other failures are not retried, so the lock
+                # is never held past one request timeout
+                _connection.close()
+                _connection = None
+                raise
+
+            if response.status in API_RETRY_STATUSES and attempt < API_RETRIES:
+                time.sleep(0.3 * 2 ** attempt)
+                continue
+            if response.status >= 400:
+                raise http.client.HTTPException(f"HTTP Error {response.status}: {response.reason}")
+            return response_body
+
+
+def _fetch_html_via_api(text: str) -> Optional[str]:
+    """Convert markdown text to HTML using external API, or None if the API fails."""
+    # Build the JSON body directly: only the value needs escaping, and
+    # non-ASCII text is sent as UTF-8 rather than \uXXXX escapes
+    json_data = b'{"markdownText":' + encode_basestring(text).encode('utf-8') + b'}'
     
     # Make the request
     try:
-        with urllib.request.urlopen(req, timeout=10) as response:
-            response_text = response.read().decode('utf-8')
+        response_body = _post_to_api(json_data)
             
-            # Check if response is a base64 data URL
-            if response_text.startswith('data:application/octet-stream;base64,'):
-                # Extract the base64 part and decode it
-                base64_data = response_text.split(',', 1)[1]
-                html = base64.b64decode(base64_data).decode('utf-8')
-                return html.strip()
-            else:
-                # Response is plain HTML
-                return response_text.strip()
+        # Check if response is a base64 data URL
+        if response_body.startswith(API_BASE64_PREFIX):
+            # Decode the base64 part straight from the response bytes
+            base64_data = memoryview(response_body)[len(API_BASE64_PREFIX):]
+            html = binascii.a2b_base64(base64_data).decode('utf-8')
+        else:
+            # Response is plain HTML
+            html = response_body.decode('utf-8')
                 
     except Exception as e:
-        # Fallback to basic HTML if API fails
         print(f"API conversion failed: {e}")
-        return f"<p>{text}</p>"
+        return None
+
+    return html.strip()
+
+
+def markdown_to_html_via_api(text: str) -> str:
+    """Convert markdown text to HTML using external API.
+
+    Falls back to basic HTML if the API fails.
+    """
+    html = _fetch_html_via_api(text)
+    return html if html is not None else f"<p>{text}</p>"
+
+
+
+# Patterns used by the local converter, compiled once
+# Block-level line kinds in one pattern; the branches start with disjoint
+# characters, so at most one of them can match a given line
+_BLOCK_RE = re.compile(
+    r'\s*(?:(?P<bullet>[-*+])|\d+\.)\s+(?P<item>.*)$'   # list item
+    r'|\s{0,3}(?P<hashes>#{1,6})\s+(?P<heading>.*)$'    # heading
+    r'|\s*>\s+(?P<quote>.*)$'                          # blockquote
+)
+# First non-blank characters a block-level line can start with
+_BLOCK_START_CHARS = frozenset('-*+#>0123456789')
+_INLINE_RE = re.compile(
+    r'`([^`]+)`'                          # inline code
+    r'|!\[([^\]]*)\]\(([^)]+)\)'          # image
+    r'|\[([^\]]+)\]\(([^)]+)\)'           # link
+    r'|\*\*(.+?)\*\*|(?<!\w)__(.+?)__(?!\w)'    # bold
+    r'|\*(.+?)\*|(?<!\w)_(.+?)_(?!\w)'          # italic
+)
+
+
+def _inline_to_html(text: str) -> str:
+    """Escape text and convert inline Markdown (code, images, links, emphasis) in one scan."""
+    # Escaping first is safe: none of the inline markers are escaped characters
+    return _INLINE_RE.sub(_inline_replacement, escape(text))
+
+
+def _inline_replacement(match: re.Match) -> str:
+    code, alt, src, label, href, bold, bold_, italic, italic_ = match.groups()
+    if code is not None:
+        return f'<code>{code}</code>'
+    if src is not None:
+        return f'<img src="{src}" alt="{alt}">'
+    if href is not None:
+        return f'<a href="{href}">{_INLINE_RE.sub(_inline_replacement, label)}</a>'
+    if bold is not None or bold_ is not None:
+        return f'<strong>{_INLINE_RE.sub(_inline_replacement, bold or bold_)}</strong>'
+    return f'<em>{_INLINE_RE.sub(_inline_replacement, italic or italic_)}</em>'
+
+
+def simple_markdown_to_html(md_text: str) -> str:
+    """Convert markdown to HTML locally, without the external API.
+
+    Classifies each line once (fence, heading, list, blockquote, paragraph)
+    and converts inline Markdown only within the line's content. All text
+    is HTML-escaped, so raw HTML in the input is shown, not rendered.
+    """
+    out: list[str] = []
+    paragraph: list[str] = []
+    code_lines: Optional[list[str]] = None  # collected while inside a fenced code block
+    list_tag: Optional[str] = None  # 'ul' or 'ol' while inside a list
 
+    def flush_paragraph():
+        if paragraph:
+            out.append('<p>' + ' '.join(paragraph) + '</p>')
+            paragraph.clear()
+
+    def close_list():
+        nonlocal list_tag
+        if list_tag:
+            out.append(f'</{list_tag}>')
+            list_tag = None
+
+    def close_blocks():
+        flush_paragraph()
+        close_list()
+
+    for line in md_text.split('\n'):
+        stripped = line.strip()
+
+        # Code blocks
+        if code_lines is not None:
+            if stripped.startswith('```'):
+                out.append('<pre><code>' + '\n'.join(code_lines) + '</code></pre>')
+                code_lines = None
+            else:
+                code_lines.append(escape(line))
+            continue
+        if stripped.startswith('```'):
+            close_blocks()
+            if len(stripped) >= 6 and stripped.endswith('```'):
+                out.append('<pre><code>' + escape(stripped[3:-3]) + '</code></pre>')
+            else:
+                code_lines = []
+            continue
+
+        if not stripped:
+            close_blocks()
+            continue
+
+        # Classify the line by its first character; most lines are prose
+        # and skip the block pattern entirely
+        match = _BLOCK_RE.match(line) if stripped[0] in _BLOCK_START_CHARS else None
+
+        # Lists
+        if match and match.group('item') is not None:
+            flush_paragraph()
+            tag = 'ul' if match.group('bullet') else 'ol'
+            if list_tag != tag:
+                close_list()
+                out.append(f'<{tag}>')
+                list_tag = tag
+            out.append(f'<li>{_inline_to_html(match.group("item"))}</li>')
+            continue
+
+        close_list()
+
+        # Headers
+        if match and match.group('heading') is not None:
+            flush_paragraph()
+            level = len(match.group('hashes'))
+            out.append(f'<h{level}>{_inline_to_html(match.group("heading"))}</h{level}>')
+            continue
+
+        # Blockquotes
+        if match:
+            flush_paragraph()
+            out.append(f'<blockquote>{_inline_to_html(match.group("quote"))}</blockquote>')
+            continue
+
+        paragraph.append(_inline_to_html(stripped))
+
+    if code_lines is not None:
+        out.append('<pre><code>' + '\n'.join(code_lines) + '</code></pre>')
+    close_blocks()
+
+    return '\n'.join(out)
+
+
+H1_STYLE = 'color: rgb(0, 0, 0); font-family: Times; font-style: normal; font-variant-ligatures: normal; font-variant-caps: normal; letter-spacing: normal; orphans: 2; text-align: start; text-indent: 0px; text-transform: none; widows: 2; word-spacing: 0px; -webkit-text-stroke-width: 0px; white-space: normal; text-decoration-thickness: initial; text-decoration-style: initial; text-decoration-color: initial;'
+P_STYLE = 'color: rgb(0, 0, 0); font-family: Times; font-size: medium; font-style: normal; font-variant-ligatures: normal; font-variant-caps: normal; font-weight: 400; letter-spacing: normal; orphans: 2; text-align: start; text-indent: 0px; text-transform: none; widows: 2; word-spacing: 0px; -webkit-text-stroke-width: 0px; white-space: normal; text-decoration-thickness: initial; text-decoration-style: initial; text-decoration-color: initial;'
+PRE_STYLE = 'display: block; color: rgb(0, 0, 0); font-family: Monaco, Menlo, Consolas, monospace; font-size: 13px; background-color: rgb(248, 248, 248); border: 1px solid rgb(231, 231, 231); border-radius: 3px; padding: 16px; margin: 16px 0; overflow-x: auto; white-space: pre;'
+CODE_STYLE = 'font-family: Monaco, Menlo, Consolas, monospace; font-size: 13px; color: rgb(51, 51, 51); background: transparent;'
+NBSP_SPAN = '<span>\xa0</span>'
+META_CHARSET = "<meta charset='utf-8'>"
+
+# Opening-tag tails built once instead of formatting the CSS per tag
+_H1_STYLE_ATTR = f' style="{H1_STYLE}">'
+_P_STYLE_ATTR = f' style="{P_STYLE}">'
+_PRE_STYLE_ATTR = f' style="{PRE_STYLE}">'
+_CODE_STYLE_ATTR = f' style="{CODE_STYLE}">'
+
+# Tags that get styled or affect styling, matched in a single scan
+_TAG_RE = re.compile(r'<(/?)(h1|p|pre|code|strong|ul|ol)\b([^>]*)>')
+_STYLE_ATTR_RE = re.compile(r'\s*style="[^"]*"')
 
 
 def add_browser_styling_to_html(html: str) -> str:
-    """Add browser-style inline CSS to HTML elements for proper clipboard formatting."""
-    
+    """Add browser-style inline CSS to HTML elements for proper clipboard formatting.
+
+    The HTML is scanned once; each matched tag is rewritten in place.
+    """
+    list_depth = 0
+
+    def style_tag(match: re.Match) -> str:
+        nonlocal list_depth
+        closing, tag, attrs = match.groups()
+
+        if tag in ('ul', 'ol'):
+            list_depth += -1 if closing else 1
+            return match.group(0)
+        if closing:
+            if tag == 'strong':
+                # Add non-breaking spaces around strong elements (like browser does)
+                return '</strong>' + NBSP_SPAN
+            return match.group(0)
+
+        if tag == 'h1':
+            return '<h1' + attrs + _H1_STYLE_ATTR
+        if tag == 'p':
+            return '<p' + attrs + _P_STYLE_ATTR
+        if tag == 'pre':
+            # Replace any existing style, and explicitly close open lists
+            # before code blocks to break list context
+            attrs = _STYLE_ATTR_RE.sub('', attrs)
+            prefix = '</ol></ul>' if list_depth > 0 else ''
+            return prefix + '<pre' + attrs + _PRE_STYLE_ATTR
+        if tag == 'code':
+            attrs = _STYLE_ATTR_RE.sub('', attrs)
+            return '<code' + attrs + _CODE_STYLE_ATTR
+        if tag == 'strong' and not attrs:
+            return NBSP_SPAN + '<strong>'
+        return match.group(0)
+
+    styled = _TAG_RE.sub(style_tag, html)
+
     # Add meta charset
-    if not html.startswith('<meta'):
-        html = "<meta charset='utf-8'>" + html
-    
-    # Style h1 elements
-    html = re.sub(
-        r'<h1([^>]*)>',
-        r'<h1\1 style="color: rgb(0, 0, 0); font-family: Times; font-style: normal; font-variant-ligatures: normal; font-variant-caps: normal; letter-spacing: normal; orphans: 2; text-align: start; text-indent: 0px; text-transform: none; widows: 2; word-spacing: 0px; -webkit-text-stroke-width: 0px; white-space: normal; text-decoration-thickness: initial; text-decoration-style: initial; text-decoration-color: initial;">',
-        html
-    )
-    
-    # Style p elements
-    html = re.sub(
-        r'<p([^>]*)>',
-        r'<p\1 style="color: rgb(0, 0, 0); font-family: Times; font-size: medium; font-style: normal; font-variant-ligatures: normal; font-variant-caps: normal; font-weight: 400; letter-spacing: normal; orphans: 2; text-align: start; text-indent: 0px; text-transform: none; widows: 2; word-spacing: 0px; -webkit-text-stroke-width: 0px; white-space: normal; text-decoration-thickness: initial; text-decoration-style: initial; text-decoration-color: initial;">',
-        html
-    )
-    
-    # Explicitly close any open lists before code blocks to break list context
-    # First remove any existing style attributes from pre tags
-    html = re.sub(r'<pre([^>]*?)style="[^"]*"([^>]*)>', r'<pre\1\2>', html)
-    
-    # Insert explicit list closure before each pre block to break list context
-    html = re.sub(
-        r'<pre([^>]*)>(.*?)</pre>',
-        r'</ol></ul><pre\1 style="display: block; color: rgb(0, 0, 0); font-family: Monaco, Menlo, Consolas, monospace; font-size: 13px; background-color: rgb(248, 248, 248); border: 1px solid rgb(231, 231, 231); border-radius: 3px; padding: 16px; margin: 16px 0; overflow-x: auto; white-space: pre;">\2</pre>',
-        html,
-        flags=re.DOTALL
-    )
-    
-        # Style code elements within pre blocks
-    # First remove any existing style attributes from code tags
-    html = re.sub(r'<code([^>]*?)style="[^"]*"([^>]*)>', r'<code\1\2>', html)
-
-    # Then add simple styling
-    html = re.sub(
-        r'<code([^>]*)>',
-        r'<code\1 style="font-family: Monaco, Menlo, Consolas, monospace; font-size: 13px; color: rgb(51, 51, 51); background: transparent;">',
-        html
+    if not styled.startswith('<meta'):
+        styled = META_CHARSET + styled
+
+    return styled
+
+
+def _is_simple_markdown(text: str) -> bool:
+    """Whether the local converter handles this Markdown well enough."""
+    return (
+        len(text) < LOCAL_CONVERSION_MAX_CHARS
+        and not _CODE_FENCE_RE.search(text)
+        and not _TABLE_RE.search(text)
+        and not _SETEXT_RE.search(text)
+        and not _LOCAL_UNSUPPORTED_RE.search(text)
     )
-    
-    # Add non-breaking spaces around strong elements (like browser does)
-    html = re.sub(r'<strong>', '<span>\xa0</span><strong>', html)
-    html = re.sub(r'</strong>', '</strong><span>\xa0</span>', html)
-    
-    return html
 
 
 def markdown_to_styled_html_and_text(text: str) -> Tuple[str, str]:
     """Convert markdown to browser-styled HTML using external API.
+
+    Short, simple Markdown is converted locally instead, which skips the
+    network round-trip entirely. Results are cached by content hash.
     
     Returns (styled_html, original_markdown_text)
     """
-    # Get HTML from API
-    html = markdown_to_html_via_api(text)
+    key = _digest(text)
+    cached = _conversion_cache.get(key)
+    if cached is not None:
+        return cached, text
+
+    if _is_simple_markdown(text):
+        html = simple_markdown_to_html(text)
+    else:
+        # Get HTML from API
+        html = _fetch_html_via_api(text)
+    cacheable = html is not None
+    if html is None:
+        # Fallback to basic HTML (not cached, so the next copy retries the API)
+        html = f"<p>{text}</p>"
     
     # Add browser-style inline CSS
     styled_html = add_browser_styling_to_html(html)
+    if cacheable:
+        _conversion_cache.put(key, styled_html)
     
     # Return styled HTML and original markdown text
-    return styled_html, text
\ No newline at end of file
+    return styled_html, text
@@ -2,47 +2,106 @@ import re
 from typing import Pattern
 
 
-_PATTERNS: list[tuple[str, Pattern[str]]] = [
-    ("heading_atx", re.compile(r"(?m)^\s{0,3}#{1,6}\s+\S")),
-    ("heading_setext", re.compile(r"(?ms)^\S.*\n\s*[-=]{3,}\s*$")),
-    ("list_bulleted", re.compile(r"(?m)^\s{0,3}[-*+]\s+\S")),
-    ("list_numbered", re.compile(r"(?m)^\s{0,3}\d+\.\s+\S")),
-    ("blockquote", re.compile(r"(?m)^\s{0,3}>\s+\S")),
-    ("code_fence", re.compile(r"(?s)```[\s\S]+?```")),
+# Strong patterns indicate markdown by themselves
+_STRONG_PATTERNS: list[tuple[str, Pattern[str]]] = [
+    ("heading_atx", re.compile(r"^\s{0,3}#{1,6}\s+\S", re.M)),
+    # Anchored at the first line that starts with a non-space character, so
+    # the scan for an underline runs once instead of once per line
+    ("heading_setext", re.compile(r"\A(?:(?:[^\S\n][^\n]*)?\n)*\S.*\n[ \t]*[-=]{3,}\s*$", re.M | re.S)),
+    ("list_bulleted", re.compile(r"^\s{0,3}[-*+]\s+\S", re.M)),
+    ("list_numbered", re.compile(r"^\s{0,3}\d+\.\s+\S", re.M)),
+    ("code_fence", re.compile(r"```[\s\S]+?```", re.S)),
     ("inline_code", re.compile(r"`[^`]+`")),
     ("link", re.compile(r"\[[^\]]+\]\([^)]+\)")),
+    # Bounded, backreference-free so adversarial input cannot backtrack badly
+    ("emphasis", re.compile(r"(?<!\w)(?:\*{1,2}[^*\n]{1,200}\*{1,2}|_{1,2}[^_\n]{1,200}_{1,2})(?!\w)")),
+]
+
+# Weak patterns only count when at least two distinct ones match
+_WEAK_PATTERNS: list[tuple[str, Pattern[str]]] = [
+    ("blockquote", re.compile(r"^\s{0,3}>\s+\S", re.M)),
     ("image", re.compile(r"!\[[^\]]*\]\([^)]+\)")),
-    ("emphasis", re.compile(r"(^|\W)(\*{1,2}|_{1,2}).+?\2(\W|$)")),
-    ("table", re.compile(r"(?m)^\s*\|.+\|\s*$")),
+    ("table", re.compile(r"^[^\S\n]*\|.+\|\s*$", re.M)),
 ]
 
+_PATTERNS: list[tuple[str, Pattern[str]]] = _STRONG_PATTERNS + _WEAK_PATTERNS
+
+# Characters at least one pattern requires, except the "." of numbered
+# lists, which is too common in prose to be a useful filter.
+_METACHAR_RE: Pattern[str] = re.compile(r"[#*_`\[>!|=+\-]")
+_NUMBERED_LIST_RE: Pattern[str] = dict(_PATTERNS)["list_numbered"]
+
+
+# Larger clipboard contents are never treated as Markdown, so copying a
+# huge file does not get scanned, converted and written back
+MAX_INPUT_CHARS = 1024 * 1024
+
+# GitHub badges and other image/link-only lines. Each part stops at
+# brackets, quotes or whitespace, so long single-line input (minified
+# JSON, for instance) is not rescanned from every "[" or "http".
+_BADGE_RE: Pattern[str] = re.compile(
+    r"!?\[[^\]\n]*\]\(https?://[^)\s]*\)"
+    r"|img\.shields\.io"
+    r"|https?://[^\s\"'<>()\[\]]+?\.svg",
+    re.I,
+)
+
+
+def _scoped(pattern: Pattern[str]) -> str:
+    flags = "".join(c for f, c in ((re.M, "m"), (re.S, "s")) if pattern.flags & f)
+    return f"(?{flags}:{pattern.pattern})" if flags else pattern.pattern
+
+
+# Strong patterns fused into one alternation: a single search finds the
+# first strong signal anywhere in the text.
+_STRONG_RE: Pattern[str] = re.compile("|".join(_scoped(pattern) for _, pattern in _STRONG_PATTERNS))
+
+# Weak patterns fused as well. Each branch sits in a lookahead so a match
+# never consumes text another kind could start in; the kind is read back
+# from the named group.
+_WEAK_RE: Pattern[str] = re.compile(
+    "|".join(f"(?=(?P<{kind}>{_scoped(pattern)}))" for kind, pattern in _WEAK_PATTERNS)
+)
+
 
 def is_markdown(text: str) -> bool:
     """Heuristically decide if the given text looks like Markdown.
 
     Strategy:
-    - Count signals from a set of common Markdown patterns.
-    - Strong signals (fences, links) can short-circuit.
+    - Ignore text longer than MAX_INPUT_CHARS.
+    - Ignore text that is mostly badges.
+    - Any strong signal (fences, links, ...) is enough; these are fused
+      into one pattern so a single search finds the first hit.
     - Otherwise require at least 2 distinct signals to reduce false positives.
     """
 
-    if not text or text.isspace():
+    if not text or len(text) > MAX_INPUT_CHARS or text.isspace():
         return False
 
-    matched_kinds: set[str] = set()
-    for kind, pattern in _PATTERNS:
-        if pattern.search(text):
-            matched_kinds.add(kind)
-
-    if not matched_kinds:
+    # Cheap single scan first: plain prose has none of the Markdown
+    # metacharacters, and then only a numbered list could still match
+    has_metachars = _METACHAR_RE.search(text) is not None
+    if not has_metachars and not _NUMBERED_LIST_RE.search(text):
         return False
 
-    # Strong patterns that indicate markdown by themselves
-    strong = {"code_fence", "link", "heading_atx", "heading_setext", "emphasis", "inline_code", "list_bulleted", "list_numbered"}
-    if matched_kinds & strong:
-        return True
+    # Skip text made up mostly of badges rather than content
+    if _BADGE_RE.search(text):
+        lines = text.split("\n")
+        badge_lines = sum(1 for line in lines if _BADGE_RE.search(line))
+        if badge_lines / len(lines) > 0.5:
+            return False
 
-    # Otherwise require at least 2 distinct signals
-    return len(matched_kinds) >= 2
+    # Numbered lists were already checked above
+    if not has_metachars:
+        return True
 
+    if _STRONG_RE.search(text):
+        return True
 
+    # Otherwise require at least 2 distinct signals
+    matched_kinds: set[str] = set()
+    for match in _WEAK_RE.finditer(text):
+        matched_kinds.add(match.lastgroup)
+        if len(matched_kinds) >= 2:
+            return True
+    return False
@@ -1,10 +1,10 @@
 from __future__ import annotations
 
 import argparse
-import hashlib
 import logging
 import signal
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
 
 from .detector import is_markdown
@@ -16,45 +16,37 @@ from .clipboard import (
 )
 
 
-def _hash_text(text: str) -> str:
-    return hashlib.sha256(text.encode("utf-8")).hexdigest()
-
-
 def run_watcher(interval: float = 0.3, dry_run: bool = False) -> None:
     """Start a loop that watches the clipboard and converts Markdown to styled HTML."""
     log = logging.getLogger("md2rt")
-    last_processed_hash: Optional[str] = None
+    # Change count produced by our own last clipboard write
+    self_write_change_count: Optional[int] = None
 
-    def on_change(_change_count: int) -> None:
-        nonlocal last_processed_hash
-        text = read_plain_text_from_pasteboard()
-        if not text:
+    def on_change(change_count: int) -> None:
+        nonlocal self_write_change_count
+        if change_count == self_write_change_count:
             return
 
-        current_hash = _hash_text(text)
-        if last_processed_hash == current_hash:
+        text = read_plain_text_from_pasteboard()
+        if not text:
             return
 
         if not is_markdown(text):
             log.debug("Clipboard changed but not Markdown; ignoring")
-            last_processed_hash = current_hash
             return
 
         try:
             styled_html, plain_text = markdown_to_styled_html_and_text(text)
         except Exception as exc:  # noqa: BLE001 - top-level boundary
             log.exception("Conversion failed: %s", exc)
-            # Do not update last_processed_hash here; allow retry on next copy.
             return
 
         if dry_run:
             log.info("[dry-run] Would add styled HTML to clipboard (%d chars), preserving original Markdown", len(styled_html))
         else:
-            add_styled_html_to_pasteboard_preserving_original(styled_html, text)
+            self_write_change_count = add_styled_html_to_pasteboard_preserving_original(styled_html, text)
             log.info("Added styled HTML to clipboard (%d chars), preserving original Markdown", len(styled_html))
 
-        last_processed_hash = _hash_text(text)
-
     poller = ClipboardPoller(interval)
 
     def handle_sigint(_signum, _frame):
@@ -62,10 +54,24 @@ def run_watcher(interval: float = 0.3, dry_run: bool = False) -> None:
 
     signal.signal(signal.SIGINT, handle_sigint)
 
+    # Conversions run off the polling thread so slow API calls don't stall polling
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="md2rt-convert")
+
+    def log_failure(future) -> None:
+        # Errors outside the conversion (clipboard read/write) would otherwise
+        # vanish with the discarded future
+        exc = future.exception()
+        if exc is not None:
+            log.error("Unhandled error: %s", exc, exc_info=exc)
+
+    def submit(change_count: int) -> None:
+        executor.submit(on_change, change_count).add_done_callback(log_failure)
+
     try:
-        poller.run(on_change)
+        poller.run(submit)
     finally:
         poller.stop()
+        executor.shutdown(wait=False)
 
 
 def main(argv: Optional[list[str]] = None) -> int:
@@ -1,4 +1,6 @@
 import sys
+import threading
+import time
 import pytest
 
 
@@ -19,3 +21,90 @@ def test_clipboard_integration():
     assert plain_text == original_markdown
 
 
+class _FakePasteboard:
+    """Pasteboard stand-in that records when the change count was polled."""
+
+    def __init__(self):
+        self.count = 0
+        self.polls = []
+
+    def changeCount(self):
+        self.polls.append((time.monotonic(), self.count))
+        return self.count
+
+
+def _start_poller(monkeypatch, **kwargs):
+    from md2rt import clipboard
+
+    pasteboard = _FakePasteboard()
+    monkeypatch.setattr(clipboard, "general_pasteboard", lambda: pasteboard)
+    poller = clipboard.ClipboardPoller(**kwargs)
+    calls = []
+    thread = threading.Thread(target=poller.run, args=(lambda count: calls.append((time.monotonic(), count)),))
+    thread.start()
+    return poller, pasteboard, calls, thread
+
+
+def test_clipboard_poller_reports_a_burst_once(monkeypatch):
+    """Test that rapid changes are debounced into one callback with the final count."""
+    poller, pasteboard, calls, thread = _start_poller(
+        monkeypatch, interval_seconds=0.01, settle_seconds=0.05
+    )
+    try:
+        for _ in range(3):
+            time.sleep(0.02)
+            pasteboard.count += 1
+        time.sleep(0.2)
+    finally:
+        poller.stop()
+        thread.join(1)
+
+    assert [count for _, count in calls] == [3]
+
+
+def test_clipboard_poller_settles_at_base_cadence_after_backoff(monkeypatch):
+    """Test that a change seen while backed off is reported after a base tick, not a backed-off one."""
+    poller, pasteboard, calls, thread = _start_poller(
+        monkeypatch, interval_seconds=0.01, max_interval_seconds=0.4, idle_seconds=0.05, settle_seconds=0.005
+    )
+    try:
+        time.sleep(0.8)  # long enough to back off to the maximum interval
+        pasteboard.count = 1
+        time.sleep(0.6)
+    finally:
+        poller.stop()
+        thread.join(1)
+
+    assert [count for _, count in calls] == [1]
+    seen_at = next(at for at, count in pasteboard.polls if count == 1)
+    assert calls[0][0] - seen_at < 0.1
+
+
+def test_clipboard_poller_reports_change_after_settle_time_not_next_tick(monkeypatch):
+    """Test that a settled change is reported without waiting for another full interval."""
+    poller, pasteboard, calls, thread = _start_poller(
+        monkeypatch, interval_seconds=0.3, settle_seconds=0.05
+    )
+    try:
+        time.sleep(0.1)
+        pasteboard.count = 1
+        time.sleep(0.6)
+    finally:
+        poller.stop()
+        thread.join(1)
+
+    assert [count for _, count in calls] == [1]
+    seen_at = next(at for at, count in pasteboard.polls if count == 1)
+    assert calls[0][0] - seen_at < 0.2
+
+
+def test_clipboard_poller_stop_interrupts_wait(monkeypatch):
+    """Test that stop() ends the loop without waiting out the interval."""
+    poller, _, _, thread = _start_poller(monkeypatch, interval_seconds=5.0)
+    time.sleep(0.05)
+    started = time.monotonic()
+    poller.stop()
+    thread.join(1)
+
+    assert not thread.is_alive()
+    assert time.monotonic() - started < 0.5
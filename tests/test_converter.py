@@ -1,4 +1,15 @@
-from md2rt.converter import markdown_to_html_via_api, markdown_to_styled_html_and_text
+import http.client
+import socket
+
+import pytest
+
+from md2rt import converter
+from md2rt.converter import (
+    add_browser_styling_to_html,
+    markdown_to_html_via_api,
+    markdown_to_styled_html_and_text,
+    simple_markdown_to_html,
+)
 
 
 def test_markdown_to_html_via_api_contains_expected_elements():
@@ -11,7 +22,8 @@ def test_markdown_to_html_via_api_contains_expected_elements():
 
 def test_markdown_to_styled_html_and_text():
     """Test the complete styled HTML conversion pipeline."""
-    markdown_text = "# Title\n\n**bold** text"
+    # Long enough to go through the external API rather than the local converter
+    markdown_text = "# Title\n\n**bold** text\n\n" + "Plain paragraph text. " * 12
     styled_html, original_text = markdown_to_styled_html_and_text(markdown_text)
     
     # Check that we get both outputs
@@ -25,3 +37,149 @@ def test_markdown_to_styled_html_and_text():
     assert "<strong>" in styled_html
 
 
+def test_lru_cache_evicts_by_entries_and_size():
+    """Test that the conversion cache stays within its bounds."""
+    from md2rt.converter import _LRUCache
+
+    cache = _LRUCache(max_entries=2, max_chars=10)
+    cache.put(b"a", "1234")
+    cache.put(b"b", "5678")
+    assert cache.get(b"a") == "1234"
+    cache.put(b"c", "90")
+    assert cache.get(b"b") is None
+    cache.put(b"d", "abcdef")
+    assert cache.get(b"a") is None
+    assert cache.get(b"d") == "abcdef"
+    cache.put(b"e", "x" * 11)
+    assert cache.get(b"e") is None
+
+
+def test_add_browser_styling_to_html_styles_tags_in_one_pass():
+    """Test that styling replaces existing styles and only closes lists when inside one."""
+    html = add_browser_styling_to_html('<p>a <strong>b</strong></p><pre style="x"><code style="y">z</code></pre>')
+
+    assert html.startswith("<meta charset='utf-8'><p style=")
+    assert "<span>\xa0</span><strong>b</strong><span>\xa0</span>" in html
+    assert 'style="x"' not in html and 'style="y"' not in html
+    assert "</ol></ul>" not in html
+    assert "</ol></ul><pre" in add_browser_styling_to_html("<ul><li><pre>z</pre></li></ul>")
+
+
+def test_simple_markdown_to_html_converts_blocks_and_inline():
+    """Test the local converter used for short Markdown."""
+    html = simple_markdown_to_html("# Title\n\n- **a** [x](y)\n- ![i](p.png)\n\n```\n*raw*\n```\ntext")
+
+    assert "<h1>Title</h1>" in html
+    assert '<ul>\n<li><strong>a</strong> <a href="y">x</a></li>\n<li><img src="p.png" alt="i"></li>\n</ul>' in html
+    assert "<pre><code>*raw*</code></pre>" in html
+    assert html.endswith("<p>text</p>")
+
+
+def test_markdown_to_styled_html_and_text_caches_repeat_conversions():
+    """Test that converting the same Markdown twice reuses the first result."""
+    first, _ = markdown_to_styled_html_and_text("## Cached\n\n*again*")
+    second, _ = markdown_to_styled_html_and_text("## Cached\n\n*again*")
+    assert second is first
+
+
+def test_simple_markdown_to_html_escapes_and_renders_lists_headings_emphasis():
+    """Test that the local converter escapes HTML and renders what the detector accepts."""
+    html = simple_markdown_to_html("Use `<br>` tags\n<script>x</script>\n\n1. one\n2. two\n\n#### Four\n\n_em_ and __b__ in snake_case")
+
+    assert "<code>&lt;br&gt;</code>" in html
+    assert "<script>" not in html and "&lt;script&gt;" in html
+    assert "<ol>\n<li>one</li>\n<li>two</li>\n</ol>" in html
+    assert "<h4>Four</h4>" in html
+    assert "<em>em</em> and <strong>b</strong> in snake_case" in html
+
+
+def test_unsupported_markdown_is_not_converted_locally():
+    """Test that Markdown the local converter cannot render goes to the API."""
+    from md2rt.converter import _is_simple_markdown
+
+    assert _is_simple_markdown("# Title\n\n*short* and [link](url)") is True
+    for text in (
+        "Title\n=====",
+        "***x***",
+        "- a\n  - b",
+        "\\*lit\\*",
+        '[a](u "t")',
+        "~~s~~",
+        "> a\n> b",
+        "a <br> b",
+    ):
+        assert _is_simple_markdown(text) is False, text
+
+
+class _FakeResponse:
+    def __init__(self, status, body=b''):
+        self.status = status
+        self.reason = 'Fake'
+        self._body = body
+
+    def read(self):
+        return self._body
+
+
+class _FakeConnection:
+    """Stand-in for HTTPSConnection that plays back scripted outcomes."""
+
+    outcomes = []
+    instances = []
+
+    def __init__(self, host, timeout=None):
+        self.requests = 0
+        self.closed = False
+        _FakeConnection.instances.append(self)
+
+    def request(self, method, path, body=None, headers=None):
+        self.requests += 1
+        self._outcome = _FakeConnection.outcomes.pop(0)
+        if isinstance(self._outcome, BaseException):
+            raise self._outcome
+
+    def getresponse(self):
+        return self._outcome
+
+    def close(self):
+        self.closed = True
+
+
+def _fake_api(monkeypatch, *outcomes):
+    """Route _post_to_api through _FakeConnection without sleeping between retries."""
+    monkeypatch.setattr(http.client, "HTTPSConnection", _FakeConnection)
+    monkeypatch.setattr(converter, "_connection", None)
+    monkeypatch.setattr(converter.time, "sleep", lambda seconds: None)
+    monkeypatch.setattr(_FakeConnection, "outcomes", list(outcomes))
+    monkeypatch.setattr(_FakeConnection, "instances", [])
+
+
+def test_post_to_api_reconnects_after_stale_connection(monkeypatch):
+    """Test that a dropped keep-alive connection is replaced and the request retried."""
+    _fake_api(monkeypatch, http.client.RemoteDisconnected("closed"), _FakeResponse(200, b"<p>ok</p>"))
+
+    assert converter._post_to_api(b"{}") == b"<p>ok</p>"
+    first, second = _FakeConnection.instances
+    assert first.closed and not second.closed
+    assert converter._connection is second
+
+
+def test_post_to_api_retries_unavailable_status(monkeypatch):
+    """Test that a 503 is retried on the same connection before returning."""
+    _fake_api(monkeypatch, _FakeResponse(503), _FakeResponse(200, b"<p>ok</p>"))
+
+    assert converter._post_to_api(b"{}") == b"<p>ok</p>"
+    connection, = _FakeConnection.instances
+    assert connection.requests == 2
+    assert not _FakeConnection.outcomes
+
+
+def test_post_to_api_does_not_retry_timeout(monkeypatch):
+    """Test that a timeout is raised at once and the connection closed."""
+    _fake_api(monkeypatch, socket.timeout("timed out"), _FakeResponse(200, b"<p>ok</p>"))
+
+    with pytest.raises(socket.timeout):
+        converter._post_to_api(b"{}")
+    connection, = _FakeConnection.instances
+    assert connection.requests == 1 and connection.closed
+    assert converter._connection is None
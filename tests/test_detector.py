@@ -1,4 +1,6 @@
-from md2rt.detector import is_markdown
+import time
+
+from md2rt.detector import MAX_INPUT_CHARS, is_markdown
 
 
 def test_is_markdown_true_on_common_patterns():
@@ -15,4 +17,39 @@ def test_is_markdown_true_on_common_patterns():
 
 def test_is_markdown_false_on_plain_text():
     txt = "This is a sentence without any markdown notation or lists."
-    assert is_markdown(txt) is False
\ No newline at end of file
+    assert is_markdown(txt) is False
+
+
+def test_is_markdown_detects_link_inside_image():
+    assert is_markdown("![logo](images/logo.png)") is True
+
+
+def test_is_markdown_false_on_badges():
+    assert is_markdown("[![Build](https://img.shields.io/badge/build-ok.svg)](https://example.com)") is False
+
+
+def test_is_markdown_true_on_markdown_with_html_or_css_snippets():
+    assert is_markdown("# CSS\n\n```css\np { color: red; }\n```") is True
+    assert is_markdown("# Markup\n\n```html\n<p>Hi</p>\n```") is True
+
+
+def test_is_markdown_false_on_oversized_input():
+    assert is_markdown("# Title\n\n" + "x" * MAX_INPUT_CHARS) is False
+
+
+def test_is_markdown_detects_setext_heading_after_indented_lines():
+    assert is_markdown("\n  note\nTitle\n=====\n") is True
+    assert is_markdown("Some prose - with a dash.\n" * 200) is False
+    # Runs of blank lines must not be rescanned from every line start
+    assert is_markdown("a #\n" + "\n" * 40000) is False
+    assert is_markdown("a |\n" + "\n" * 40000) is False
+
+
+def test_is_markdown_scans_long_single_line_json_quickly():
+    items = ",".join(
+        '{"id":%d,"name":"item[%d]","url":"https://example.com/a/%d","tags":["x","y"]}' % (i, i, i)
+        for i in range(1200)
+    )
+    started = time.perf_counter()
+    assert is_markdown("[" + items + "]") is False
+    assert time.perf_counter() - started < 1.0
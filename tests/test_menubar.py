@@ -0,0 +1,8 @@
+from md2rt.menubar import is_converted_html
+
+
+def test_is_converted_html_on_html_and_rich_text():
+    """Test that already converted clipboard content is recognized."""
+    assert is_converted_html("<h1>Title</h1>\n<p>**bold** text</p>") is True
+    assert is_converted_html('<span style="font-family: Times">x</span>') is True
+    assert is_converted_html("# Title\n\n**bold** text") is False